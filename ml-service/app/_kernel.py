@@ -0,0 +1,60 @@
+"""
+Compiled URL Statistics Kernel
+Counts the characters used by the URL features and their entropy in one pass
+"""
+
+import numpy as np
+from numba import njit
+
+# Byte values of the counted characters (globals are frozen in at compile time)
+_DOT, _HYPHEN, _UNDERSCORE, _SLASH = ord('.'), ord('-'), ord('_'), ord('/')
+_QUESTION, _EQUAL, _AT, _AMPERSAND, _PERCENT = ord('?'), ord('='), ord('@'), ord('&'), ord('%')
+_ZERO, _NINE = ord('0'), ord('9')
+
+
+@njit(cache=True)
+def url_stats(url_bytes: np.ndarray) -> tuple:
+    """
+    Count feature characters and compute Shannon entropy over URL bytes
+
+    Args:
+        url_bytes: uint8 view of the UTF-8 encoded URL (entropy is only
+            per-character for ASCII URLs)
+
+    Returns:
+        Tuple of (dots, hyphens, underscores, slashes, question_marks,
+        equal_signs, at_symbols, ampersands, percent_signs, digits,
+        double_slashes, entropy)
+    """
+    counts = np.zeros(256, np.int64)
+    double_slashes = 0
+    after_slash = False
+    for i in range(url_bytes.size):
+        c = url_bytes[i]
+        counts[c] += 1
+
+        # Non-overlapping '//' pairs, matching bytes.count(b'//')
+        if c == _SLASH:
+            if after_slash:
+                double_slashes += 1
+            after_slash = not after_slash
+        else:
+            after_slash = False
+
+    digits = 0
+    for c in range(_ZERO, _NINE + 1):
+        digits += counts[c]
+
+    entropy = 0.0
+    length = url_bytes.size
+    if length > 0:
+        for c in range(256):
+            if counts[c] > 0:
+                probability = counts[c] / length
+                entropy -= probability * np.log2(probability)
+
+    return (
+        counts[_DOT], counts[_HYPHEN], counts[_UNDERSCORE], counts[_SLASH],
+        counts[_QUESTION], counts[_EQUAL], counts[_AT], counts[_AMPERSAND],
+        counts[_PERCENT], digits, double_slashes, entropy
+    )
@@ -4,145 +4,208 @@ Extracts key features from URLs to detect phishing attempts
 """
 
 import re
+from functools import lru_cache
 from urllib.parse import urlparse
+import numpy as np
 import tldextract
 
+from app._kernel import url_stats
+
+# Feature vector layout shared by training and inference
+FEATURE_NAMES = (
+    'url_length', 'domain_length', 'has_https', 'has_http',
+    'num_dots', 'num_hyphens', 'num_underscores', 'num_slashes',
+    'num_question_marks', 'num_equal_signs', 'num_at_symbols',
+    'num_ampersands', 'num_percent_signs', 'has_at_symbol',
+    'has_double_slash_redirect', 'num_digits', 'digit_ratio',
+    'subdomain_length', 'has_subdomain', 'num_subdomains',
+    'path_length', 'num_path_tokens', 'has_query_params',
+    'num_query_params', 'is_ip_address', 'has_port',
+    'tld_length', 'has_suspicious_tld', 'has_phishing_keyword',
+    'url_entropy'
+)
+
+# Slot of each feature in the vector (mirrors FEATURE_NAMES line for line)
+(
+    IDX_URL_LENGTH, IDX_DOMAIN_LENGTH, IDX_HAS_HTTPS, IDX_HAS_HTTP,
+    IDX_NUM_DOTS, IDX_NUM_HYPHENS, IDX_NUM_UNDERSCORES, IDX_NUM_SLASHES,
+    IDX_NUM_QUESTION_MARKS, IDX_NUM_EQUAL_SIGNS, IDX_NUM_AT_SYMBOLS,
+    IDX_NUM_AMPERSANDS, IDX_NUM_PERCENT_SIGNS, IDX_HAS_AT_SYMBOL,
+    IDX_HAS_DOUBLE_SLASH_REDIRECT, IDX_NUM_DIGITS, IDX_DIGIT_RATIO,
+    IDX_SUBDOMAIN_LENGTH, IDX_HAS_SUBDOMAIN, IDX_NUM_SUBDOMAINS,
+    IDX_PATH_LENGTH, IDX_NUM_PATH_TOKENS, IDX_HAS_QUERY_PARAMS,
+    IDX_NUM_QUERY_PARAMS, IDX_IS_IP_ADDRESS, IDX_HAS_PORT,
+    IDX_TLD_LENGTH, IDX_HAS_SUSPICIOUS_TLD, IDX_HAS_PHISHING_KEYWORD,
+    IDX_URL_ENTROPY
+) = range(len(FEATURE_NAMES))
+
+# Real-valued features; every other feature is an integer count or flag
+_FLOAT_FEATURES = frozenset(('digit_ratio', 'url_entropy'))
+
+# Built once per process: uses the bundled public suffix snapshot, so no
+# suffix list is ever fetched or re-read from disk while serving requests
+_TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+# URL matching runs on the UTF-8 bytes, so the patterns below are bytes too
+_SUSPICIOUS_TLDS = (b'.tk', b'.ml', b'.ga', b'.cf', b'.gq', b'.xyz', b'.top')
+
+_PHISHING_KEYWORDS = (
+    'login', 'signin', 'account', 'update', 'confirm', 'verify',
+    'secure', 'ebay', 'paypal', 'amazon', 'bank', 'apple'
+)
+# One case-insensitive alternation scans the URL once, without a lowercased copy
+_PHISHING_KEYWORD_RE = re.compile(
+    b'|'.join(re.escape(keyword.encode()) for keyword in _PHISHING_KEYWORDS), re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def _extract_domain_parts(netloc: str):
+    """Split a network location into subdomain/domain/suffix, memoized per host"""
+    return _TLD_EXTRACT(netloc)
+
+
+def _is_ip_address(host: str) -> bool:
+    """Check for a dotted quad of 1-3 digit groups; most hosts fail the dot count"""
+    if host.count('.') != 3:
+        return False
+    return all(0 < len(part) <= 3 and part.isdecimal() for part in host.split('.'))
+
 
 class URLFeatureExtractor:
     """Extract features from URLs for phishing detection"""
     
     @staticmethod
-    def extract_features(url: str) -> dict:
+    def extract_feature_vector(url: str, out: np.ndarray = None) -> np.ndarray:
         """
-        Extract comprehensive features from a URL
+        Extract comprehensive features from a URL as a packed vector
         
         Args:
             url: The URL to analyze
+            out: Optional float32 buffer (e.g. a row of a batch matrix) to fill
+                in place; every slot is overwritten, so it may be uninitialized
             
         Returns:
-            Dictionary containing extracted features
+            float32 array ordered like FEATURE_NAMES
         """
-        features = {}
+        if out is None:
+            out = np.empty(len(FEATURE_NAMES), dtype=np.float32)
+        
+        # Parse once; every structural feature below reads from this result
+        parsed = urlparse(url)
+        netloc = parsed.netloc
+        
+        # Scan the UTF-8 bytes: ASCII characters never occur inside multibyte
+        # sequences, so byte-level counts and affix checks match the str ones
+        url_bytes = url.encode('utf-8', 'surrogatepass')
         
         # Basic URL properties
-        features['url_length'] = len(url)
-        features['domain_length'] = len(urlparse(url).netloc)
+        url_length = len(url)
+        out[IDX_URL_LENGTH] = url_length
+        out[IDX_DOMAIN_LENGTH] = len(netloc)
         
         # Protocol analysis
-        features['has_https'] = 1 if url.startswith('https://') else 0
-        features['has_http'] = 1 if url.startswith('http://') else 0
+        out[IDX_HAS_HTTPS] = url_bytes.startswith(b'https://')
+        out[IDX_HAS_HTTP] = url_bytes.startswith(b'http://')
         
-        # Character analysis
-        features['num_dots'] = url.count('.')
-        features['num_hyphens'] = url.count('-')
-        features['num_underscores'] = url.count('_')
-        features['num_slashes'] = url.count('/')
-        features['num_question_marks'] = url.count('?')
-        features['num_equal_signs'] = url.count('=')
-        features['num_at_symbols'] = url.count('@')
-        features['num_ampersands'] = url.count('&')
-        features['num_percent_signs'] = url.count('%')
+        # Character analysis (single compiled pass over the URL bytes)
+        stats = url_stats(np.frombuffer(url_bytes, dtype=np.uint8))
+        out[IDX_NUM_DOTS:IDX_NUM_PERCENT_SIGNS + 1] = stats[:9]
+        num_digits = stats[9]
         
         # Suspicious character presence
-        features['has_at_symbol'] = 1 if '@' in url else 0
-        features['has_double_slash_redirect'] = 1 if url.count('//') > 1 else 0
+        out[IDX_HAS_AT_SYMBOL] = out[IDX_NUM_AT_SYMBOLS] > 0
+        out[IDX_HAS_DOUBLE_SLASH_REDIRECT] = stats[10] > 1
         
         # Digit analysis
-        features['num_digits'] = sum(c.isdigit() for c in url)
-        features['digit_ratio'] = features['num_digits'] / len(url) if len(url) > 0 else 0
+        out[IDX_NUM_DIGITS] = num_digits
+        out[IDX_DIGIT_RATIO] = num_digits / url_length if url_length > 0 else 0
         
         # Parse domain information
         try:
-            parsed = urlparse(url)
-            extracted = tldextract.extract(url)
+            extracted = _extract_domain_parts(netloc)
+            subdomain = extracted.subdomain
             
             # Domain analysis
-            features['subdomain_length'] = len(extracted.subdomain)
-            features['has_subdomain'] = 1 if extracted.subdomain else 0
-            features['num_subdomains'] = len(extracted.subdomain.split('.')) if extracted.subdomain else 0
+            out[IDX_SUBDOMAIN_LENGTH] = len(subdomain)
+            out[IDX_HAS_SUBDOMAIN] = bool(subdomain)
+            out[IDX_NUM_SUBDOMAINS] = len(subdomain.split('.')) if subdomain else 0
             
             # Path analysis
             path = parsed.path
-            features['path_length'] = len(path)
-            features['num_path_tokens'] = len(path.split('/'))
+            out[IDX_PATH_LENGTH] = len(path)
+            out[IDX_NUM_PATH_TOKENS] = len(path.split('/'))
             
             # Query parameters
             query = parsed.query
-            features['has_query_params'] = 1 if query else 0
-            features['num_query_params'] = len(query.split('&')) if query else 0
+            out[IDX_HAS_QUERY_PARAMS] = bool(query)
+            out[IDX_NUM_QUERY_PARAMS] = len(query.split('&')) if query else 0
             
             # Check for IP address as domain
-            ip_pattern = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
-            features['is_ip_address'] = 1 if re.match(ip_pattern, parsed.netloc.split(':')[0]) else 0
+            is_ip_address = _is_ip_address(netloc.partition(':')[0])
+            out[IDX_IS_IP_ADDRESS] = is_ip_address
             
             # Port analysis
-            features['has_port'] = 1 if ':' in parsed.netloc and not features['is_ip_address'] else 0
+            out[IDX_HAS_PORT] = ':' in netloc and not is_ip_address
             
             # TLD analysis
-            features['tld_length'] = len(extracted.suffix)
-            suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top']
-            features['has_suspicious_tld'] = 1 if any(url.endswith(tld) for tld in suspicious_tlds) else 0
+            out[IDX_TLD_LENGTH] = len(extracted.suffix)
+            out[IDX_HAS_SUSPICIOUS_TLD] = url_bytes.endswith(_SUSPICIOUS_TLDS)
             
         except Exception as e:
             # If parsing fails, set default values
-            features['subdomain_length'] = 0
-            features['has_subdomain'] = 0
-            features['num_subdomains'] = 0
-            features['path_length'] = 0
-            features['num_path_tokens'] = 0
-            features['has_query_params'] = 0
-            features['num_query_params'] = 0
-            features['is_ip_address'] = 0
-            features['has_port'] = 0
-            features['tld_length'] = 0
-            features['has_suspicious_tld'] = 0
+            out[IDX_SUBDOMAIN_LENGTH:IDX_HAS_SUSPICIOUS_TLD + 1] = 0
         
         # Suspicious keywords in URL
-        phishing_keywords = [
-            'login', 'signin', 'account', 'update', 'confirm', 'verify',
-            'secure', 'ebay', 'paypal', 'amazon', 'bank', 'apple'
-        ]
-        features['has_phishing_keyword'] = 1 if any(keyword in url.lower() for keyword in phishing_keywords) else 0
+        out[IDX_HAS_PHISHING_KEYWORD] = _PHISHING_KEYWORD_RE.search(url_bytes) is not None
         
         # Entropy calculation (complexity measure)
-        features['url_entropy'] = URLFeatureExtractor.calculate_entropy(url)
+        if url.isascii():
+            out[IDX_URL_ENTROPY] = stats[11]
+        else:
+            # Multibyte characters must be counted as code points, not bytes
+            out[IDX_URL_ENTROPY] = URLFeatureExtractor.calculate_entropy(url)
         
-        return features
+        return out
+    
+    @staticmethod
+    def extract_features(url: str) -> dict:
+        """
+        Extract comprehensive features from a URL
+        
+        Args:
+            url: The URL to analyze
+            
+        Returns:
+            Dictionary containing extracted features
+        """
+        return URLFeatureExtractor.features_to_dict(
+            URLFeatureExtractor.extract_feature_vector(url)
+        )
+    
+    @staticmethod
+    def features_to_dict(vector: np.ndarray) -> dict:
+        """Key a feature vector by name, restoring integer counts and flags"""
+        return {
+            name: round(value, 6) if name in _FLOAT_FEATURES else int(value)
+            for name, value in zip(FEATURE_NAMES, vector.tolist())
+        }
     
     @staticmethod
     def calculate_entropy(string: str) -> float:
         """Calculate Shannon entropy of a string"""
-        from collections import Counter
-        import math
-        
         if not string:
             return 0.0
         
-        # Calculate frequency of each character
-        freq = Counter(string)
-        length = len(string)
-        
-        # Calculate entropy
-        entropy = 0.0
-        for count in freq.values():
-            probability = count / length
-            if probability > 0:
-                entropy -= probability * math.log2(probability)
+        # Count code points so non-ASCII characters stay distinct
+        codepoints = np.frombuffer(string.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        _, counts = np.unique(codepoints, return_counts=True)
         
-        return entropy
+        # Calculate entropy from the character probabilities
+        probabilities = counts / len(string)
+        return float(-(probabilities * np.log2(probabilities)).sum())
     
     @staticmethod
     def get_feature_names() -> list:
         """Return list of all feature names in order"""
-        return [
-            'url_length', 'domain_length', 'has_https', 'has_http',
-            'num_dots', 'num_hyphens', 'num_underscores', 'num_slashes',
-            'num_question_marks', 'num_equal_signs', 'num_at_symbols',
-            'num_ampersands', 'num_percent_signs', 'has_at_symbol',
-            'has_double_slash_redirect', 'num_digits', 'digit_ratio',
-            'subdomain_length', 'has_subdomain', 'num_subdomains',
-            'path_length', 'num_path_tokens', 'has_query_params',
-            'num_query_params', 'is_ip_address', 'has_port',
-            'tld_length', 'has_suspicious_tld', 'has_phishing_keyword',
-            'url_entropy'
-        ]
+        return list(FEATURE_NAMES)
@@ -5,15 +5,22 @@ Provides REST API endpoint for phishing URL prediction
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, HttpUrl, validator
 import numpy as np
+import asyncio
+import itertools
 import logging
+import os
+import threading
+import time
+from pathlib import Path
 from typing import Optional
+from cachetools import TTLCache
 import uvicorn
-import uuid
 from datetime import datetime
 
-from app.feature_extractor import URLFeatureExtractor
+from app.feature_extractor import FEATURE_NAMES, URLFeatureExtractor
 from app.model_loader import ModelLoader
 
 # Configure logging
@@ -27,7 +34,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Phishing Threat Intelligence API",
     description="ML-powered API for real-time phishing URL detection",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -65,10 +73,114 @@ class PredictionResponse(BaseModel):
 model_loader = ModelLoader()
 feature_extractor = URLFeatureExtractor()
 
+# Recent /api/v1/scan-url verdicts keyed by URL (one cache per worker process)
+scan_cache = TTLCache(maxsize=10_000, ttl=3600)
+scan_cache_lock = threading.Lock()
+
+# Prebuilt body for the most common rejection; only url/timestamp/requestId vary
+_BAD_SCHEME_ERROR = {"error": "URL must start with http:// or https://"}
+
+# Request IDs count up from a random per-process start instead of drawing a UUID each time
+_request_ids = itertools.count(int.from_bytes(os.urandom(4), 'big'))
+
+
+def _request_id() -> str:
+    """Return a short 8-hex-digit request identifier"""
+    return f"{next(_request_ids) & 0xFFFFFFFF:08x}"
+
+
+def _score(feature_matrix: np.ndarray) -> tuple:
+    """
+    Score feature rows with a single pass over the model
+    
+    Labels are derived from the class probabilities instead of running the
+    tree ensemble a second time through predict().
+    
+    Raises:
+        RuntimeError: If no model is loaded
+    """
+    probabilities = model_loader.predict_proba(feature_matrix)
+    return probabilities.argmax(axis=1), probabilities
+
+
+def _model_prediction(url: str, features: dict, prediction, probabilities) -> dict:
+    """
+    Build the response for one URL from the model's class probabilities
+    
+    Returns a plain dict with the PredictionResponse fields, so batch results
+    skip a per-URL model validation and .dict() copy.
+    """
+    # Get confidence and risk score
+    phishing_probability = probabilities[1] if len(probabilities) > 1 else probabilities[0]
+    confidence = float(max(probabilities))
+    risk_score = float(phishing_probability * 100)
+    
+    # Determine prediction label
+    prediction_label = "Phishing" if prediction == 1 else "Benign"
+    
+    # Generate message
+    if prediction_label == "Phishing":
+        if risk_score >= 90:
+            message = "HIGH RISK: This URL is highly likely to be a phishing attempt. Do not proceed."
+        elif risk_score >= 70:
+            message = "MEDIUM RISK: This URL shows signs of phishing. Proceed with caution."
+        else:
+            message = "LOW RISK: This URL may be suspicious. Verify before proceeding."
+    else:
+        message = "This URL appears to be legitimate."
+    
+    logger.info(f"Prediction: {prediction_label}, Confidence: {confidence:.2f}, Risk Score: {risk_score:.2f}")
+    
+    return {
+        "url": url,
+        "prediction": prediction_label,
+        "confidence": round(confidence, 4),
+        "risk_score": round(risk_score, 2),
+        "features": features,
+        "message": message
+    }
+
+
+def _demo_prediction(url: str, features: dict, include_features: bool = True) -> dict:
+    """Heuristic prediction used when no trained model is loaded"""
+    # Simple heuristic for demo
+    risk_indicators = 0
+    if features['has_at_symbol']:
+        risk_indicators += 1
+    if features['is_ip_address']:
+        risk_indicators += 1
+    if features['has_suspicious_tld']:
+        risk_indicators += 1
+    if features['has_phishing_keyword']:
+        risk_indicators += 1
+    if features['url_length'] > 75:
+        risk_indicators += 1
+    if features['num_dots'] > 4:
+        risk_indicators += 1
+    
+    risk_score = min((risk_indicators / 6) * 100, 100)
+    prediction_label = "Phishing" if risk_indicators >= 3 else "Benign"
+    confidence = 0.75 if risk_indicators >= 3 else 0.80
+    
+    message = "Demo mode prediction (model not trained yet)"
+    
+    return {
+        "url": url,
+        "prediction": prediction_label,
+        "confidence": confidence,
+        "risk_score": risk_score,
+        "features": features if include_features else None,
+        "message": message
+    }
+
 
 @app.on_event("startup")
 async def startup_event():
     """Load model on startup"""
+    # Compile (or load from cache) the numba URL kernel now, so the first
+    # request in each worker doesn't pay for it
+    feature_extractor.extract_feature_vector("http://warmup.local")
+    
     try:
         logger.info("Loading ML model...")
         model_loader.load_model()
@@ -98,27 +210,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    try:
-        model = model_loader.get_model()
-        model_loaded = True
-    except:
-        model_loaded = False
-    
     return {
         "status": "healthy",
-        "model_loaded": model_loaded
+        "model_loaded": model_loader.is_loaded()
     }
 
 
 @app.get("/debug")
 async def debug_info():
     """Debug endpoint to check file system and environment"""
-    import os
-    from pathlib import Path
-    
     base_dir = Path(__file__).parent.parent
     models_dir = base_dir / "models"
-    model_path = models_dir / "phishing_model.pkl"
+    # The file actually being served, or the one load_model() would pick
+    model_path = model_loader.model_path or model_loader.default_model_path()
     
     return {
         "base_dir": str(base_dir),
@@ -133,12 +237,13 @@ async def debug_info():
 
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_url(request: URLRequest):
+async def predict_url(request: URLRequest, include_features: bool = False):
     """
     Predict if a URL is phishing or benign
     
     Args:
         request: URLRequest containing the URL to analyze
+        include_features: Also return the extracted feature values
         
     Returns:
         PredictionResponse with prediction results
@@ -147,81 +252,23 @@ async def predict_url(request: URLRequest):
         logger.info(f"Analyzing URL: {request.url}")
         
         # Extract features
-        features = feature_extractor.extract_features(request.url)
-        logger.debug(f"Extracted features: {features}")
-        
-        # Prepare features for model
-        feature_names = feature_extractor.get_feature_names()
-        feature_vector = np.array([[features[name] for name in feature_names]])
+        feature_vector = feature_extractor.extract_feature_vector(request.url)
+        features = None
+        if include_features:
+            features = feature_extractor.features_to_dict(feature_vector)
+            logger.debug(f"Extracted features: {features}")
         
         # Make prediction
         try:
-            model = model_loader.get_model()
-            prediction = model.predict(feature_vector)[0]
-            probabilities = model.predict_proba(feature_vector)[0]
-            
-            # Get confidence and risk score
-            phishing_probability = probabilities[1] if len(probabilities) > 1 else probabilities[0]
-            confidence = float(max(probabilities))
-            risk_score = float(phishing_probability * 100)
+            predictions, probabilities = _score(feature_vector.reshape(1, -1))
             
-            # Determine prediction label
-            prediction_label = "Phishing" if prediction == 1 else "Benign"
-            
-            # Generate message
-            if prediction_label == "Phishing":
-                if risk_score >= 90:
-                    message = "HIGH RISK: This URL is highly likely to be a phishing attempt. Do not proceed."
-                elif risk_score >= 70:
-                    message = "MEDIUM RISK: This URL shows signs of phishing. Proceed with caution."
-                else:
-                    message = "LOW RISK: This URL may be suspicious. Verify before proceeding."
-            else:
-                message = "This URL appears to be legitimate."
-            
-            logger.info(f"Prediction: {prediction_label}, Confidence: {confidence:.2f}, Risk Score: {risk_score:.2f}")
-            
-            return PredictionResponse(
-                url=request.url,
-                prediction=prediction_label,
-                confidence=round(confidence, 4),
-                risk_score=round(risk_score, 2),
-                features=features,
-                message=message
-            )
+            return _model_prediction(request.url, features, predictions[0], probabilities[0])
             
         except RuntimeError:
             # Model not loaded - demo mode
             logger.warning("Model not loaded. Using heuristic-based demo prediction.")
-            
-            # Simple heuristic for demo
-            risk_indicators = 0
-            if features['has_at_symbol']:
-                risk_indicators += 1
-            if features['is_ip_address']:
-                risk_indicators += 1
-            if features['has_suspicious_tld']:
-                risk_indicators += 1
-            if features['has_phishing_keyword']:
-                risk_indicators += 1
-            if features['url_length'] > 75:
-                risk_indicators += 1
-            if features['num_dots'] > 4:
-                risk_indicators += 1
-            
-            risk_score = min((risk_indicators / 6) * 100, 100)
-            prediction_label = "Phishing" if risk_indicators >= 3 else "Benign"
-            confidence = 0.75 if risk_indicators >= 3 else 0.80
-            
-            message = "Demo mode prediction (model not trained yet)"
-            
-            return PredictionResponse(
-                url=request.url,
-                prediction=prediction_label,
-                confidence=confidence,
-                risk_score=risk_score,
-                features=features,
-                message=message
+            return _demo_prediction(
+                request.url, feature_extractor.features_to_dict(feature_vector), include_features
             )
             
     except ValueError as e:
@@ -232,29 +279,69 @@ async def predict_url(request: URLRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/batch-predict")
-async def batch_predict(urls: list[str]):
+def _predict_batch(urls: list, include_features: bool) -> list:
     """
-    Predict multiple URLs at once
+    Extract features and score a batch of URLs (blocking)
     
-    Args:
-        urls: List of URLs to analyze
-        
-    Returns:
-        List of prediction results
+    Features are extracted straight into the rows of one preallocated matrix,
+    then every valid URL is scored with a single model call on it.
     """
     results = []
-    for url in urls[:100]:  # Limit to 100 URLs per batch
+    pending = []  # (result slot, url) for each filled row of feature_matrix
+    feature_matrix = np.empty((len(urls), len(FEATURE_NAMES)), dtype=np.float32)
+    for url in urls:
         try:
             request = URLRequest(url=url)
-            result = await predict_url(request)
-            results.append(result.dict())
+            feature_extractor.extract_feature_vector(request.url, out=feature_matrix[len(pending)])
+            pending.append((len(results), request.url))
+            results.append(None)
         except Exception as e:
             results.append({
                 "url": url,
                 "error": str(e)
             })
     
+    if pending:
+        # Score the whole batch with a single model call
+        feature_matrix = feature_matrix[:len(pending)]
+        try:
+            predictions, probabilities = _score(feature_matrix)
+            for (slot, url), feature_vector, prediction, row in zip(pending, feature_matrix, predictions, probabilities):
+                features = feature_extractor.features_to_dict(feature_vector) if include_features else None
+                results[slot] = _model_prediction(url, features, prediction, row)
+        except RuntimeError:
+            # Model not loaded - demo mode
+            logger.warning("Model not loaded. Using heuristic-based demo prediction.")
+            for (slot, url), feature_vector in zip(pending, feature_matrix):
+                features = feature_extractor.features_to_dict(feature_vector)
+                results[slot] = _demo_prediction(url, features, include_features)
+        except Exception as e:
+            logger.error(f"Batch prediction error: {str(e)}", exc_info=True)
+            for slot, url in pending:
+                results[slot] = {
+                    "url": url,
+                    "error": f"Internal server error: {str(e)}"
+                }
+    
+    return results
+
+
+@app.post("/batch-predict")
+async def batch_predict(urls: list[str], include_features: bool = False):
+    """
+    Predict multiple URLs at once
+    
+    Args:
+        urls: List of URLs to analyze
+        include_features: Also return the extracted feature values per URL
+        
+    Returns:
+        List of prediction results
+    """
+    # Run the CPU-bound work in the executor so the event loop keeps serving
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(None, _predict_batch, urls[:100], include_features)  # Limit to 100 URLs per batch
+    
     return {"results": results, "total": len(results)}
 
 
@@ -273,8 +360,8 @@ async def scan_url_direct(url: str):
     Returns:
         JSON response matching Spring Boot format
     """
-    import time
     start_time = time.time()
+    timestamp = datetime.fromtimestamp(start_time).isoformat()
     
     try:
         logger.info(f"Direct API - Analyzing URL: {url}")
@@ -282,25 +369,39 @@ async def scan_url_direct(url: str):
         # Validate URL
         if not url.startswith(('http://', 'https://')):
             return {
-                "error": "URL must start with http:// or https://",
+                **_BAD_SCHEME_ERROR,
                 "url": url,
-                "timestamp": datetime.now().isoformat(),
-                "requestId": str(uuid.uuid4())[:8]
+                "timestamp": timestamp,
+                "requestId": _request_id()
+            }
+        
+        # Serve repeat scans from the cache
+        with scan_cache_lock:
+            cached = scan_cache.get(url)
+        if cached is not None:
+            return {
+                **cached,
+                "responseTimeMs": int((time.time() - start_time) * 1000),
+                "fromCache": True,
+                "timestamp": timestamp,
+                "requestId": _request_id()
             }
         
         # Extract features
-        features = feature_extractor.extract_features(url)
+        feature_vector = feature_extractor.extract_feature_vector(url).reshape(1, -1)
         
         # Make prediction
+        cacheable = True
         try:
             model = model_loader.get_model()
             if model is None:
                 # Demo mode - pattern-based detection
+                url_lower = url.lower()
                 is_phishing = any([
-                    'secure-' in url.lower() and ('.tk' in url or '.ml' in url),
-                    'verify' in url.lower() and len(url) > 50,
-                    'login.php' in url.lower(),
-                    'confirm' in url.lower() and url.count('-') > 3,
+                    'secure-' in url_lower and ('.tk' in url or '.ml' in url),
+                    'verify' in url_lower and len(url) > 50,
+                    'login.php' in url_lower,
+                    'confirm' in url_lower and url.count('-') > 3,
                     url.count('.') > 3,
                     any(char in url for char in ['0', '1'] * 3)  # suspicious chars
                 ])
@@ -308,11 +409,8 @@ async def scan_url_direct(url: str):
                 prediction_label = "Phishing" if is_phishing else "Benign"
             else:
                 # Real model prediction
-                feature_names = feature_extractor.get_feature_names()
-                feature_vector = np.array([[features[name] for name in feature_names]])
-                
-                prediction = model.predict(feature_vector)[0]
-                probabilities = model.predict_proba(feature_vector)[0]
+                predictions, probabilities = _score(feature_vector)
+                prediction, probabilities = predictions[0], probabilities[0]
                 
                 phishing_probability = probabilities[1] if len(probabilities) > 1 else probabilities[0]
                 confidence = float(max(probabilities))
@@ -320,8 +418,10 @@ async def scan_url_direct(url: str):
         
         except Exception as model_error:
             logger.error(f"Model prediction failed: {model_error}")
-            # Fallback to demo mode
-            is_phishing = 'phishing' in url.lower() or 'secure-' in url.lower()
+            # Fallback to demo mode (not cached, so the model is retried)
+            cacheable = False
+            url_lower = url.lower()
+            is_phishing = 'phishing' in url_lower or 'secure-' in url_lower
             confidence = 0.75
             prediction_label = "Phishing" if is_phishing else "Benign"
         
@@ -331,18 +431,25 @@ async def scan_url_direct(url: str):
         else:
             message = "This URL appears to be legitimate."
         
+        verdict = {
+            "url": url,
+            "prediction": prediction_label,
+            "confidence": round(confidence, 4),
+            "message": message
+        }
+        if cacheable:
+            with scan_cache_lock:
+                scan_cache[url] = verdict
+        
         # Calculate response time
         response_time = int((time.time() - start_time) * 1000)
         
         return {
-            "url": url,
-            "prediction": prediction_label,
-            "confidence": round(confidence, 4),
-            "message": message,
+            **verdict,
             "responseTimeMs": response_time,
             "fromCache": False,
-            "timestamp": datetime.now().isoformat(),
-            "requestId": str(uuid.uuid4())[:8]
+            "timestamp": timestamp,
+            "requestId": _request_id()
         }
         
     except Exception as e:
@@ -350,20 +457,15 @@ async def scan_url_direct(url: str):
         return {
             "error": f"Analysis failed: {str(e)}",
             "url": url,
-            "timestamp": datetime.now().isoformat(),
-            "requestId": str(uuid.uuid4())[:8]
+            "timestamp": timestamp,
+            "requestId": _request_id()
         }
 
 
 @app.get("/api/v1/health")
 async def health_check_direct():
     """Health check endpoint compatible with Spring Boot Actuator"""
-    try:
-        model_loader_instance = ModelLoader()
-        model = model_loader_instance.get_model()
-        model_loaded = model is not None
-    except:
-        model_loaded = False
+    model_loaded = model_loader.is_loaded()
     
     return {
         "status": "UP",
@@ -384,12 +486,7 @@ async def health_check_direct():
 @app.get("/api/v1/stats") 
 async def get_stats_direct():
     """Statistics endpoint compatible with Spring Boot"""
-    try:
-        model_loader_instance = ModelLoader()
-        model = model_loader_instance.get_model()
-        model_status = "loaded" if model else "demo_mode"
-    except:
-        model_status = "error"
+    model_status = "loaded" if model_loader.is_loaded() else "demo_mode"
     
     return {
         "status": "operational",
@@ -3,54 +3,157 @@ Model Loader for Phishing Detection
 Handles loading and caching of the trained ML model
 """
 
-import pickle
 import os
+import hashlib
 from pathlib import Path
 import logging
+import joblib
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+MODELS_DIR = Path(__file__).parent.parent / "models"
+# Default model files, most preferred first
+MODEL_FILES = ("phishing_model.onnx", "phishing_model.ubj", "phishing_model.json", "phishing_model.pkl")
+# ONNX metadata_props key holding the sha256 of the .pkl an export was built from
+ONNX_SOURCE_KEY = "source_sha256"
+
+
+def file_sha256(path) -> str:
+    """Hex sha256 digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OnnxModel:
+    """Run an ONNX-exported classifier through ONNX Runtime"""
+    
+    def __init__(self, model_path):
+        import onnxruntime as ort
+        
+        self._session = ort.InferenceSession(str(model_path), providers=['CPUExecutionProvider'])
+        self._input_name = self._session.get_inputs()[0].name
+        # Converted classifiers emit [label, probabilities]
+        self._proba_name = self._session.get_outputs()[1].name
+        # Set by scripts/export_onnx.py; None for exports that predate it
+        self.source_sha256 = self._session.get_modelmeta().custom_metadata_map.get(ONNX_SOURCE_KEY)
+    
+    def predict_proba(self, features):
+        """Return class probabilities with the same shape as the sklearn API"""
+        features = np.asarray(features, dtype=np.float32)
+        return self._session.run([self._proba_name], {self._input_name: features})[0]
+    
+    def predict(self, features):
+        """Return predicted class labels"""
+        return self.predict_proba(features).argmax(axis=1)
+
+
+class BoosterModel:
+    """Serve a natively saved XGBoost booster through inplace_predict"""
+    
+    def __init__(self, model_path):
+        import xgboost as xgb
+        
+        self._booster = xgb.Booster()
+        self._booster.load_model(str(model_path))
+        # Early-stopped models keep extra rounds; only score up to the best one
+        best_iteration = self._booster.attr('best_iteration')
+        self._iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+    
+    def predict_proba(self, features):
+        """Return class probabilities with the same shape as the sklearn API"""
+        features = np.asarray(features, dtype=np.float32)
+        phishing = self._booster.inplace_predict(features, iteration_range=self._iteration_range)
+        return np.column_stack((1 - phishing, phishing))
+    
+    def predict(self, features):
+        """Return predicted class labels"""
+        return self.predict_proba(features).argmax(axis=1)
+
 
 class ModelLoader:
     """Singleton class to load and cache the ML model"""
     
     _instance = None
     _model = None
+    _model_path = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ModelLoader, cls).__new__(cls)
         return cls._instance
     
+    @staticmethod
+    def default_model_path() -> Path:
+        """
+        Resolve the model file to load when no path is given
+        
+        Prefers the ONNX export, then the native XGBoost dumps, then the pickle.
+        An ONNX export not built from the current phishing_model.pkl is skipped,
+        judged by the source hash export_onnx.py records in it.
+        """
+        candidates = [MODELS_DIR / name for name in MODEL_FILES]
+        existing = [path for path in candidates if path.exists()]
+        if not existing:
+            return candidates[-1]
+        
+        onnx_path, pkl_path = candidates[0], candidates[-1]
+        if existing[0] == onnx_path and len(existing) > 1 and pkl_path.exists():
+            if OnnxModel(onnx_path).source_sha256 != file_sha256(pkl_path):
+                logger.warning(
+                    f"{onnx_path} was not exported from the current {pkl_path.name}, skipping it. "
+                    "Re-run scripts/export_onnx.py to serve through ONNX Runtime."
+                )
+                return existing[1]
+        return existing[0]
+    
     def load_model(self, model_path: str = None):
         """
         Load the trained model from disk
         
         Args:
-            model_path: Path to the .pkl model file
+            model_path: Path to the .onnx, native XGBoost (.json/.ubj) or .pkl model file
         """
         if self._model is not None:
             logger.info("Model already loaded, returning cached instance")
             return self._model
         
         if model_path is None:
-            # Default path
-            base_dir = Path(__file__).parent.parent
-            model_path = base_dir / "models" / "phishing_model.pkl"
+            model_path = self.default_model_path()
         
         if not os.path.exists(model_path):
             logger.error(f"Model file not found at {model_path}")
             raise FileNotFoundError(f"Model file not found: {model_path}")
         
         try:
-            with open(model_path, 'rb') as f:
-                self._model = pickle.load(f)
+            suffix = Path(model_path).suffix
+            if suffix == '.onnx':
+                self._model = OnnxModel(model_path)
+            elif suffix in ('.json', '.ubj'):
+                # XGBoost's own format loads the trees directly, no unpickling
+                self._model = BoosterModel(model_path)
+            else:
+                # Memory-map any numpy arrays so forked workers share the pages
+                self._model = joblib.load(model_path, mmap_mode='r')
+            self._model_path = Path(model_path)
             logger.info(f"Model successfully loaded from {model_path}")
             return self._model
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    @property
+    def model_path(self):
+        """Path of the loaded model file, or None if no model is loaded"""
+        return self._model_path
+    
+    def is_loaded(self) -> bool:
+        """Check whether a model has been loaded, without raising"""
+        return self._model is not None
+    
     def get_model(self):
         """Get the loaded model instance"""
         if self._model is None:
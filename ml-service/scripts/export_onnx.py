@@ -0,0 +1,62 @@
+"""
+Export Trained Model to ONNX
+Converts the pickled XGBoost classifier for faster ONNX Runtime inference
+"""
+
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.feature_extractor import FEATURE_NAMES
+from app.model_loader import ONNX_SOURCE_KEY, file_sha256
+
+import joblib
+
+from onnxmltools import convert_xgboost
+from onnxmltools.convert.common.data_types import FloatTensorType
+
+
+def export_model(model_path: Path, output_path: Path) -> Path:
+    """
+    Convert a pickled XGBClassifier to an ONNX graph
+    
+    Args:
+        model_path: Path to the trained .pkl model
+        output_path: Where to write the .onnx file
+    """
+    print(f"Loading model from {model_path}...")
+    model = joblib.load(model_path)
+    
+    print("Converting to ONNX...")
+    initial_types = [('input', FloatTensorType([None, len(FEATURE_NAMES)]))]
+    onnx_model = convert_xgboost(model, initial_types=initial_types, target_opset=15)
+    
+    # Lets the service tell whether this export still matches the trained model
+    source = onnx_model.metadata_props.add()
+    source.key, source.value = ONNX_SOURCE_KEY, file_sha256(model_path)
+    
+    with open(output_path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+    
+    print(f"ONNX model saved to: {output_path}")
+    return output_path
+
+
+def main():
+    """Export models/phishing_model.pkl to models/phishing_model.onnx"""
+    models_dir = Path(__file__).parent.parent / "models"
+    model_path = models_dir / "phishing_model.pkl"
+    
+    if not model_path.exists():
+        print(f"\nERROR: Model not found at {model_path}")
+        print("Please run 'python scripts/train_model.py' first!")
+        return
+    
+    export_model(model_path, models_dir / "phishing_model.onnx")
+    print("\nThe ML service loads the ONNX model automatically on next start.")
+
+
+if __name__ == "__main__":
+    main()
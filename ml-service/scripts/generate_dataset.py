@@ -3,8 +3,9 @@ Generate Synthetic Phishing Dataset
 Creates a dataset with both legitimate and phishing URLs for training
 """
 
+import itertools
+import numpy as np
 import pandas as pd
-import random
 from typing import List
 import os
 from pathlib import Path
@@ -23,6 +24,9 @@ class DatasetGenerator:
         'walmart.com', 'target.com', 'ebay.com', 'bestbuy.com', 'homedepot.com'
     ]
     
+    # Brand names with the TLD stripped once (also handles wikipedia.org)
+    LEGIT_DOMAINS_NO_TLD = [domain.rsplit('.', 1)[0] for domain in LEGIT_DOMAINS]
+    
     # Suspicious/Phishing patterns
     PHISHING_KEYWORDS = [
         'login', 'signin', 'verify', 'account', 'update', 'confirm', 'secure',
@@ -32,159 +36,215 @@ class DatasetGenerator:
     SUSPICIOUS_TLDS = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.club']
     
     @staticmethod
-    def generate_legitimate_urls(n: int = 5000) -> List[str]:
-        """Generate legitimate-looking URLs"""
-        urls = []
-        
-        for _ in range(n):
-            domain = random.choice(DatasetGenerator.LEGIT_DOMAINS)
-            
-            # Add variations
-            variation = random.randint(1, 5)
-            
-            if variation == 1:
-                # Simple homepage
-                url = f"https://{domain}"
-            elif variation == 2:
-                # With path
-                paths = ['about', 'contact', 'products', 'services', 'blog', 'news', 'help']
-                url = f"https://{domain}/{random.choice(paths)}"
-            elif variation == 3:
-                # With subdomain
-                subdomains = ['www', 'mail', 'blog', 'shop', 'support', 'dev', 'api']
-                url = f"https://{random.choice(subdomains)}.{domain}"
-            elif variation == 4:
-                # With query parameters
-                params = ['id', 'page', 'category', 'search', 'q']
-                param = random.choice(params)
-                value = random.randint(1, 100)
-                url = f"https://{domain}/page?{param}={value}"
-            else:
-                # Complex path
-                sections = ['products', 'category', 'items', 'details']
-                section = random.choice(sections)
-                item_id = random.randint(1000, 9999)
-                url = f"https://{domain}/{section}/{item_id}"
-            
-            urls.append(url)
-        
-        return urls
+    def _pick(rng: np.random.Generator, options, size: int) -> np.ndarray:
+        """Draw `size` random elements of `options` as a string array"""
+        return np.asarray(options)[rng.integers(0, len(options), size=size)]
     
     @staticmethod
-    def generate_phishing_urls(n: int = 5000) -> List[str]:
-        """Generate phishing-like URLs"""
-        urls = []
-        
-        for _ in range(n):
-            technique = random.randint(1, 10)
-            
-            if technique == 1:
-                # IP address as domain
-                ip = f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}"
-                url = f"http://{ip}/{random.choice(DatasetGenerator.PHISHING_KEYWORDS)}"
-            
-            elif technique == 2:
-                # Suspicious TLD
-                domain = random.choice(DatasetGenerator.LEGIT_DOMAINS).replace('.com', '')
-                tld = random.choice(DatasetGenerator.SUSPICIOUS_TLDS)
-                keyword = random.choice(DatasetGenerator.PHISHING_KEYWORDS)
-                url = f"http://{domain}-{keyword}{tld}"
-            
-            elif technique == 3:
-                # @ symbol trick
-                fake_domain = random.choice(DatasetGenerator.LEGIT_DOMAINS)
-                real_evil = f"evil{random.randint(100,999)}.com"
-                url = f"http://{fake_domain}@{real_evil}/{random.choice(DatasetGenerator.PHISHING_KEYWORDS)}"
-            
-            elif technique == 4:
-                # Typosquatting
-                domain = random.choice(DatasetGenerator.LEGIT_DOMAINS)
-                # Insert typo
-                typo_domain = domain.replace('o', '0').replace('l', '1').replace('a', 'а')
-                keyword = random.choice(DatasetGenerator.PHISHING_KEYWORDS)
-                url = f"http://{typo_domain}/{keyword}"
-            
-            elif technique == 5:
-                # Subdomain overload
-                legit = random.choice(DatasetGenerator.LEGIT_DOMAINS).replace('.com', '')
-                evil_domain = f"evil{random.randint(100,999)}.com"
-                keyword = random.choice(DatasetGenerator.PHISHING_KEYWORDS)
-                url = f"http://{legit}.{keyword}.verify.{evil_domain}"
-            
-            elif technique == 6:
-                # Long suspicious URL
-                domain = f"secure-{random.choice(DatasetGenerator.LEGIT_DOMAINS).replace('.com', '')}"
-                keywords = '-'.join(random.sample(DatasetGenerator.PHISHING_KEYWORDS, 3))
-                url = f"http://{domain}-{keywords}-portal{random.randint(10,99)}.tk/login.php"
-            
-            elif technique == 7:
-                # URL with excessive dots
-                parts = [f"secure{random.randint(1,9)}", "account", "verify"]
-                domain = f"evil{random.randint(100,999)}.com"
-                url = f"http://{'.'.join(parts)}.{domain}"
-            
-            elif technique == 8:
-                # Port number (suspicious)
-                domain = random.choice(DatasetGenerator.LEGIT_DOMAINS).replace('.com', '') + str(random.randint(1,99))
-                port = random.choice([8080, 8888, 3000, 8000])
-                url = f"http://{domain}.tk:{port}/{random.choice(DatasetGenerator.PHISHING_KEYWORDS)}"
-            
-            elif technique == 9:
-                # Suspicious path with many slashes
-                domain = f"site{random.randint(100,999)}.xyz"
-                path = '/'.join(['login', 'secure', 'verify', 'account', 'update'])
-                url = f"http://{domain}/{path}"
-            
-            else:
-                # Mixed suspicious elements
-                legit_brand = random.choice(DatasetGenerator.LEGIT_DOMAINS).replace('.com', '')
-                keyword = random.choice(DatasetGenerator.PHISHING_KEYWORDS)
-                num = random.randint(100, 9999)
-                url = f"http://{keyword}-{legit_brand}{num}.tk/secure/login.php?id={num}"
-            
-            urls.append(url)
-        
-        return urls
+    def _numbers(rng: np.random.Generator, low: int, high: int, size: int) -> np.ndarray:
+        """Draw integers in [low, high] (inclusive, like random.randint) as strings"""
+        # Sized to the widest value rather than astype(str)'s <U21
+        return rng.integers(low, high + 1, size=size).astype(f'<U{len(str(high))}')
     
     @staticmethod
-    def create_dataset(n_legitimate: int = 5000, n_phishing: int = 5000, output_path: str = None):
+    def _join(*parts) -> List[str]:
+        """
+        Concatenate strings and string sequences element-wise
+        
+        Each URL is assembled by one str.join over its parts; plain str parts
+        are repeated for every element. This is a single pass, unlike chained
+        np.char.add calls, which loop per element and copy the array each time.
+        
+        Raises:
+            ValueError: If every part is a plain str (the row count is unknown)
+        """
+        if all(isinstance(part, str) for part in parts):
+            raise ValueError("_join needs at least one sequence part to set the row count")
+        
+        columns = [
+            itertools.repeat(part) if isinstance(part, str)
+            else part.tolist() if isinstance(part, np.ndarray) else part
+            for part in parts
+        ]
+        return list(map(''.join, zip(*columns)))
+    
+    @staticmethod
+    def generate_legitimate_urls(n: int = 5000, rng: np.random.Generator = None) -> List[str]:
+        """Generate legitimate-looking URLs (from a fresh unseeded generator unless `rng` is given)"""
+        if rng is None:
+            rng = np.random.default_rng()
+        pick, join = DatasetGenerator._pick, DatasetGenerator._join
+        urls = np.empty(n, dtype=object)
+        
+        # Add variations (each URL draws one at random, as before)
+        variation = rng.integers(1, 6, size=n)
+        domains = pick(rng, DatasetGenerator.LEGIT_DOMAINS, n)
+        
+        # Simple homepage
+        mask = variation == 1
+        urls[mask] = join("https://", domains[mask])
+        
+        # With path
+        mask = variation == 2
+        paths = ['about', 'contact', 'products', 'services', 'blog', 'news', 'help']
+        urls[mask] = join("https://", domains[mask], "/", pick(rng, paths, mask.sum()))
+        
+        # With subdomain
+        mask = variation == 3
+        subdomains = ['www', 'mail', 'blog', 'shop', 'support', 'dev', 'api']
+        urls[mask] = join("https://", pick(rng, subdomains, mask.sum()), ".", domains[mask])
+        
+        # With query parameters
+        mask = variation == 4
+        params = ['id', 'page', 'category', 'search', 'q']
+        values = DatasetGenerator._numbers(rng, 1, 100, mask.sum())
+        urls[mask] = join("https://", domains[mask], "/page?", pick(rng, params, mask.sum()), "=", values)
+        
+        # Complex path
+        mask = variation == 5
+        sections = ['products', 'category', 'items', 'details']
+        item_ids = DatasetGenerator._numbers(rng, 1000, 9999, mask.sum())
+        urls[mask] = join("https://", domains[mask], "/", pick(rng, sections, mask.sum()), "/", item_ids)
+        
+        return urls.tolist()
+    
+    @staticmethod
+    def generate_phishing_urls(n: int = 5000, rng: np.random.Generator = None) -> List[str]:
+        """Generate phishing-like URLs (from a fresh unseeded generator unless `rng` is given)"""
+        if rng is None:
+            rng = np.random.default_rng()
+        join = DatasetGenerator._join
+        urls = np.empty(n, dtype=object)
+        
+        technique = rng.integers(1, 11, size=n)
+        
+        def draw(options, size):
+            return DatasetGenerator._pick(rng, options, size)
+        
+        def numbers(low, high, size):
+            return DatasetGenerator._numbers(rng, low, high, size)
+        
+        # IP address as domain
+        mask = technique == 1
+        m = mask.sum()
+        ip = join(numbers(1, 255, m), ".", numbers(1, 255, m), ".", numbers(1, 255, m), ".", numbers(1, 255, m))
+        urls[mask] = join("http://", ip, "/", draw(DatasetGenerator.PHISHING_KEYWORDS, m))
+        
+        # Suspicious TLD
+        mask = technique == 2
+        m = mask.sum()
+        domain = draw(DatasetGenerator.LEGIT_DOMAINS_NO_TLD, m)
+        tld = draw(DatasetGenerator.SUSPICIOUS_TLDS, m)
+        keyword = draw(DatasetGenerator.PHISHING_KEYWORDS, m)
+        urls[mask] = join("http://", domain, "-", keyword, tld)
+        
+        # @ symbol trick
+        mask = technique == 3
+        m = mask.sum()
+        fake_domain = draw(DatasetGenerator.LEGIT_DOMAINS, m)
+        real_evil = join("evil", numbers(100, 999, m), ".com")
+        urls[mask] = join("http://", fake_domain, "@", real_evil, "/", draw(DatasetGenerator.PHISHING_KEYWORDS, m))
+        
+        # Typosquatting
+        mask = technique == 4
+        m = mask.sum()
+        domain = draw(DatasetGenerator.LEGIT_DOMAINS, m)
+        # Insert typo
+        typo_domain = np.char.replace(np.char.replace(np.char.replace(domain, 'o', '0'), 'l', '1'), 'a', 'а')
+        keyword = draw(DatasetGenerator.PHISHING_KEYWORDS, m)
+        urls[mask] = join("http://", typo_domain, "/", keyword)
+        
+        # Subdomain overload
+        mask = technique == 5
+        m = mask.sum()
+        legit = draw(DatasetGenerator.LEGIT_DOMAINS_NO_TLD, m)
+        evil_domain = join("evil", numbers(100, 999, m), ".com")
+        keyword = draw(DatasetGenerator.PHISHING_KEYWORDS, m)
+        urls[mask] = join("http://", legit, ".", keyword, ".verify.", evil_domain)
+        
+        # Long suspicious URL
+        mask = technique == 6
+        m = mask.sum()
+        domain = join("secure-", draw(DatasetGenerator.LEGIT_DOMAINS_NO_TLD, m))
+        # Three distinct keywords per URL, like random.sample
+        sampled = np.asarray(DatasetGenerator.PHISHING_KEYWORDS)[
+            rng.random((m, len(DatasetGenerator.PHISHING_KEYWORDS))).argsort(axis=1)[:, :3]
+        ]
+        keywords = join(sampled[:, 0], "-", sampled[:, 1], "-", sampled[:, 2])
+        urls[mask] = join("http://", domain, "-", keywords, "-portal", numbers(10, 99, m), ".tk/login.php")
+        
+        # URL with excessive dots
+        mask = technique == 7
+        m = mask.sum()
+        domain = join("evil", numbers(100, 999, m), ".com")
+        urls[mask] = join("http://secure", numbers(1, 9, m), ".account.verify.", domain)
+        
+        # Port number (suspicious)
+        mask = technique == 8
+        m = mask.sum()
+        domain = join(draw(DatasetGenerator.LEGIT_DOMAINS_NO_TLD, m), numbers(1, 99, m))
+        port = draw(['8080', '8888', '3000', '8000'], m)
+        urls[mask] = join("http://", domain, ".tk:", port, "/", draw(DatasetGenerator.PHISHING_KEYWORDS, m))
+        
+        # Suspicious path with many slashes
+        mask = technique == 9
+        m = mask.sum()
+        domain = join("site", numbers(100, 999, m), ".xyz")
+        path = '/'.join(['login', 'secure', 'verify', 'account', 'update'])
+        urls[mask] = join("http://", domain, "/", path)
+        
+        # Mixed suspicious elements
+        mask = technique == 10
+        m = mask.sum()
+        legit_brand = draw(DatasetGenerator.LEGIT_DOMAINS_NO_TLD, m)
+        keyword = draw(DatasetGenerator.PHISHING_KEYWORDS, m)
+        num = numbers(100, 9999, m)
+        urls[mask] = join("http://", keyword, "-", legit_brand, num, ".tk/secure/login.php?id=", num)
+        
+        return urls.tolist()
+    
+    @staticmethod
+    def create_dataset(n_legitimate: int = 5000, n_phishing: int = 5000, output_path: str = None,
+                       seed: int = 42):
         """
         Create complete dataset with both legitimate and phishing URLs
         
         Args:
             n_legitimate: Number of legitimate URLs to generate
             n_phishing: Number of phishing URLs to generate
-            output_path: Path to save the CSV file
+            output_path: Path to save the dataset (Parquet, or CSV for a .csv path)
+            seed: Seed for the one generator behind URLs and shuffle (None for fresh entropy)
         """
+        rng = np.random.default_rng(seed)
+        
         print(f"Generating {n_legitimate} legitimate URLs...")
-        legit_urls = DatasetGenerator.generate_legitimate_urls(n_legitimate)
+        legit_urls = DatasetGenerator.generate_legitimate_urls(n_legitimate, rng)
         
         print(f"Generating {n_phishing} phishing URLs...")
-        phishing_urls = DatasetGenerator.generate_phishing_urls(n_phishing)
-        
-        # Create dataframe
-        df_legit = pd.DataFrame({
-            'url': legit_urls,
-            'label': 0  # 0 = Benign
-        })
+        phishing_urls = DatasetGenerator.generate_phishing_urls(n_phishing, rng)
         
-        df_phishing = pd.DataFrame({
-            'url': phishing_urls,
-            'label': 1  # 1 = Phishing
-        })
+        # Combine into flat arrays (0 = Benign, 1 = Phishing)
+        urls = np.array(legit_urls + phishing_urls, dtype=object)
+        labels = np.concatenate([
+            np.zeros(len(legit_urls), dtype=np.int8),
+            np.ones(len(phishing_urls), dtype=np.int8)
+        ])
         
-        # Combine and shuffle
-        df = pd.concat([df_legit, df_phishing], ignore_index=True)
-        df = df.sample(frac=1, random_state=42).reset_index(drop=True)
+        # Shuffle with a single permutation, then build the dataframe once
+        order = rng.permutation(len(urls))
+        df = pd.DataFrame({'url': urls[order], 'label': labels[order]})
         
-        # Save to CSV
+        # Save as Parquet: typed and columnar, so training skips CSV parsing
         if output_path is None:
             base_dir = Path(__file__).parent.parent
             data_dir = base_dir / "data"
             data_dir.mkdir(exist_ok=True)
-            output_path = data_dir / "phishing_dataset.csv"
+            output_path = data_dir / "phishing_dataset.parquet"
         
-        df.to_csv(output_path, index=False)
+        if Path(output_path).suffix == '.csv':
+            df.to_csv(output_path, index=False)
+        else:
+            df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
         print(f"\nDataset created successfully!")
         print(f"Total URLs: {len(df)}")
         print(f"Legitimate URLs: {len(df[df['label'] == 0])}")
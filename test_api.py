@@ -6,11 +6,27 @@ Tests the complete Phishing Detection API system
 import requests
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 
 # Configuration
 SPRING_GATEWAY_URL = "http://localhost:8080"
 ML_SERVICE_URL = "http://localhost:8000"
+CONCURRENCY = 32
+BATCH_SIZE = 100  # /batch-predict scores at most 100 URLs per request
+
+# One session for the serial calls keeps TCP connections to the services warm
+session = requests.Session()
+
+# requests.Session is not documented as thread-safe, so each load-test worker gets its own
+_worker_sessions = threading.local()
+
+def worker_session() -> requests.Session:
+    """Return the calling thread's session, creating it on first use"""
+    if not hasattr(_worker_sessions, "session"):
+        _worker_sessions.session = requests.Session()
+    return _worker_sessions.session
 
 class Colors:
     GREEN = '\033[92m'
@@ -32,7 +48,7 @@ def print_status(message: str, status: str = "info"):
 def check_service(name: str, url: str) -> bool:
     """Check if a service is running"""
     try:
-        response = requests.get(url, timeout=5)
+        response = session.get(url, timeout=5)
         if response.status_code == 200:
             print_status(f"✓ {name} is running", "success")
             return True
@@ -52,7 +68,7 @@ def test_ml_service_prediction(url: str) -> Dict:
     
     try:
         start_time = time.time()
-        response = requests.post(
+        response = session.post(
             f"{ML_SERVICE_URL}/predict",
             json={"url": url},
             timeout=10
@@ -73,13 +89,39 @@ def test_ml_service_prediction(url: str) -> Dict:
         print_status(f"  Error: {str(e)}", "error")
         return None
 
+def test_ml_service_batch(urls: List[str]) -> List[Dict]:
+    """Test ML service batch endpoint, BATCH_SIZE URLs per request"""
+    print_status(f"\nTesting ML Service batch endpoint with {len(urls)} URLs", "info")
+    
+    try:
+        results = []
+        start_time = time.time()
+        for i in range(0, len(urls), BATCH_SIZE):
+            response = session.post(
+                f"{ML_SERVICE_URL}/batch-predict",
+                json=urls[i:i + BATCH_SIZE],
+                timeout=30
+            )
+            if response.status_code != 200:
+                print_status(f"  Error: Status {response.status_code}", "error")
+                return None
+            results.extend(response.json()['results'])
+        elapsed_time = (time.time() - start_time) * 1000
+        
+        print_status(f"  Requests: {-(-len(urls) // BATCH_SIZE)}", "success")
+        print_status(f"  Total Time: {elapsed_time:.2f}ms ({elapsed_time / len(urls):.3f}ms per URL)", "success")
+        return results
+    except Exception as e:
+        print_status(f"  Error: {str(e)}", "error")
+        return None
+
 def test_gateway_scan(url: str) -> Dict:
     """Test Spring Gateway"""
     print_status(f"\nTesting Spring Gateway with URL: {url}", "info")
     
     try:
         start_time = time.time()
-        response = requests.get(
+        response = session.get(
             f"{SPRING_GATEWAY_URL}/api/v1/scan-url",
             params={"url": url},
             timeout=10
@@ -126,6 +168,36 @@ def test_cache_performance():
         else:
             print_status("\n✗ Cache might not be working", "warning")
 
+def test_concurrent_throughput(urls: List[str], repeat: int = 100):
+    """Fire repeated gateway scans concurrently and report throughput"""
+    print_status("\n" + "="*60, "info")
+    print_status("Testing Concurrent Throughput", "info")
+    print_status("="*60, "info")
+    
+    def scan(url: str) -> bool:
+        try:
+            response = worker_session().get(
+                f"{SPRING_GATEWAY_URL}/api/v1/scan-url",
+                params={"url": url},
+                timeout=10
+            )
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+    
+    # Requests are I/O-bound, so threads overlap the network waits
+    batch = urls * repeat
+    print_status(f"\nSending {len(batch)} requests with {CONCURRENCY} workers...", "info")
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        results = list(executor.map(scan, batch))
+    elapsed_time = time.time() - start_time
+    
+    succeeded = sum(results)
+    print_status(f"  Succeeded: {succeeded}/{len(batch)}", "success" if succeeded == len(batch) else "warning")
+    print_status(f"  Wall Time: {elapsed_time:.2f}s", "success")
+    print_status(f"  Throughput: {len(batch) / elapsed_time:.1f} req/s", "success")
+
 def run_test_suite():
     """Run complete test suite"""
     print_status("\n" + "="*60, "info")
@@ -160,6 +232,13 @@ def run_test_suite():
         elif result:
             print_status(f"  ⚠ Unexpected prediction for {url}: got {result['prediction']}, expected {expected}", "warning")
     
+    # Batch scoring amortizes HTTP and model-call overhead across many URLs
+    batch = test_urls * 100
+    results = test_ml_service_batch([url for url, _ in batch])
+    if results:
+        correct = sum(result.get('prediction') == expected for result, (_, expected) in zip(results, batch))
+        print_status(f"  ✓ {correct}/{len(batch)} batch predictions as expected", "success" if correct == len(batch) else "warning")
+    
     # Step 3: Test Gateway
     print_status("\n" + "="*60, "info")
     print_status("3. Testing Spring Boot Gateway", "info")
@@ -173,7 +252,10 @@ def run_test_suite():
     # Step 4: Test caching
     test_cache_performance()
     
-    # Step 5: Summary
+    # Step 5: Test concurrent load
+    test_concurrent_throughput([url for url, _ in test_urls])
+    
+    # Step 6: Summary
     print_status("\n" + "="*60, "info")
     print_status("Test Suite Complete!", "success")
     print_status("="*60, "info")